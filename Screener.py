@@ -2,17 +2,29 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import yfinance as yf
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import scipy.stats as stats
-import scipy.signal as signal
-import statsmodels.api as sm
-from statsmodels.tsa.stattools import adfuller, kpss, acf
-from arch import arch_model
+from scipy.optimize import minimize
+from scipy.special import ndtri
+from statsmodels.tsa.adfvalues import mackinnonp
+import kernels
+from kernels import (
+    adf_tstat_kernel, analog_positions_kernel, boxcox_detrend_z_kernel, drawdown_kernel,
+    garch11_negloglik, garch11_sigma2, greedy_nonoverlap_kernel, kpss_stat_kernel,
+    range_ratio_kernel, rolling_corr_kernel, var_cvar_kernel,
+)
 import plotly.graph_objects as go
-import plotly.express as px
 from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+import threading
+import warnings
 import os
+import time
 from typing import Optional
 
 # --- CONFIGURATION ---
@@ -41,66 +53,30 @@ def briefing(title: str, md: str):
     with st.expander(f"Briefing: {title}", expanded=False):
         st.markdown(md)
 
-def forward_simple_returns_from_log(log_returns: pd.Series, horizon_days: int) -> pd.Series:
-    """
-    Compute forward simple returns over `horizon_days` using log returns.
-    Returns a series aligned to the start date of the horizon.
-    """
-    lr = pd.Series(log_returns).dropna()
-    if lr.empty or horizon_days < 1:
-        return pd.Series(dtype=float)
-    horizon_log = lr.shift(-1).rolling(horizon_days).sum().shift(-(horizon_days - 1))
-    return np.expm1(horizon_log)
-
-def forward_simple_returns_from_loglevel(log_level: pd.Series, horizon_days: int) -> pd.Series:
-    """
-    Compute forward simple returns for a log-level series (e.g., log spread).
-    """
-    s = pd.Series(log_level).dropna()
-    if s.empty or horizon_days < 1:
-        return pd.Series(dtype=float)
-    horizon_log = s.shift(-horizon_days) - s
-    return np.expm1(horizon_log)
-
-def select_non_overlapping(event_idx: pd.DatetimeIndex, horizon_days: int) -> pd.DatetimeIndex:
-    """Keep first event, then skip any events within the forward window."""
-    if len(event_idx) == 0:
-        return event_idx
-    event_idx = event_idx.sort_values()
-    selected = []
-    last = None
-    for dt in event_idx:
-        if last is None or (dt - last).days >= horizon_days:
-            selected.append(dt)
-            last = dt
-    return pd.DatetimeIndex(selected)
-
-def select_non_overlapping_by_bars(index: pd.DatetimeIndex, event_idx: pd.DatetimeIndex, horizon_bars: int) -> pd.DatetimeIndex:
-    """
-    Keep the first event, then skip any events that occur within the next `horizon_bars`
-    on the provided trading-day index (avoids weekend/holiday distortions).
-    """
-    if len(event_idx) == 0:
-        return event_idx
-    idx = pd.DatetimeIndex(index).sort_values()
-    pos = {ts: i for i, ts in enumerate(idx)}
-    events = [ts for ts in pd.DatetimeIndex(event_idx).sort_values() if ts in pos]
-    selected = []
-    last_i = None
-    for ts in events:
-        i = pos[ts]
-        if last_i is None or (i - last_i) >= horizon_bars:
-            selected.append(ts)
-            last_i = i
-    return pd.DatetimeIndex(selected)
-
 def percentile_rank(series: pd.Series, value: float) -> float:
     """Percentile rank of `value` within `series` (0-100)."""
-    s = pd.Series(series).dropna()
-    if s.empty:
+    a = np.sort(np.asarray(series, dtype=float))
+    a = a[:a.size - np.count_nonzero(np.isnan(a))]  # NaNs sort to the end
+    return percentile_rank_sorted(a, value)
+
+def percentile_rank_sorted(a: np.ndarray, value: float) -> float:
+    """`percentile_rank` against an already sorted, NaN-free array (two binary searches)."""
+    if a.size == 0 or np.isnan(value):
         return float("nan")
-    return float(stats.percentileofscore(s, value))
+    # Same as scipy's percentileofscore(kind='rank'): average rank across ties.
+    lo = np.searchsorted(a, value, side='left')
+    hi = np.searchsorted(a, value, side='right')
+    return float(50.0 * (lo + hi + (hi > lo)) / a.size)
+
+def thread_pool(max_workers: int) -> ThreadPoolExecutor:
+    """ThreadPoolExecutor whose workers inherit the current Streamlit script context."""
+    ctx = get_script_run_ctx()
+    return ThreadPoolExecutor(
+        max_workers=max_workers,
+        initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx),
+    )
 
+@st.cache_data(ttl=60*60*24, show_spinner=False)
 def get_earnings_dates_yf(ticker: str) -> Optional[pd.DatetimeIndex]:
     """
     Best-effort earnings dates via yfinance. Returns None if unavailable.
@@ -110,149 +86,341 @@ def get_earnings_dates_yf(ticker: str) -> Optional[pd.DatetimeIndex]:
         df = t.get_earnings_dates(limit=32)
         if df is None or df.empty:
             return None
-        dates = pd.to_datetime(df.index).normalize()
-        return pd.DatetimeIndex(dates)
+        dates = pd.to_datetime(df.index)
+        if dates.tz is not None:
+            # Compare on exchange-local calendar days against the tz-naive price index.
+            dates = dates.tz_localize(None)
+        return pd.DatetimeIndex(dates.normalize())
     except Exception:
         return None
 
-def get_data(ticker, source, start_date, end_date):
+@st.cache_resource
+def http_session() -> requests.Session:
+    """Pooled keep-alive session with retry/backoff, shared across reruns."""
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+    session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=retry))
+    return session
+
+@st.cache_resource
+def _fetch_counters() -> dict:
+    """Process-wide call/miss counters for `get_data` (survive reruns)."""
+    return {"calls": 0, "misses": 0}
+
+def cache_stats() -> dict:
+    """Snapshot of `get_data` cache effectiveness (calls, misses, hit rate)."""
+    c = _fetch_counters()
+    calls, misses = c["calls"], c["misses"]
+    hit_rate = (calls - misses) / calls if calls else None
+    return {"calls": calls, "misses": misses, "hit_rate": hit_rate}
+
+DISK_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+FETCH_TTL = 60*60*12  # Seconds; shared by the memory and disk tiers so today's bar refreshes.
+
+def _disk_cache_path(ticker, source, start_date, end_date) -> str:
+    safe_ticker = "".join(ch if ch.isalnum() else "_" for ch in ticker)
+    return os.path.join(DISK_CACHE_DIR, source, f"{safe_ticker}_{start_date:%Y-%m-%d}_{end_date:%Y-%m-%d}.parquet")
+
+def _prune_disk_cache(directory: str) -> None:
+    """Delete cached files older than `FETCH_TTL` (keys roll over daily, so they are never read again)."""
+    cutoff = time.time() - FETCH_TTL
     try:
-        if source == "Polygon":
-            if not POLYGON_KEY:
-                raise RuntimeError("Missing Polygon API key. Set `POLYGON_KEY` in Streamlit Secrets (or env var POLYGON_KEY).")
-            s_date = start_date.strftime("%Y-%m-%d")
-            e_date = end_date.strftime("%Y-%m-%d")
-            url = f"https://api.polygon.io/v2/aggs/ticker/{ticker}/range/1/day/{s_date}/{e_date}"
-            params = {"adjusted": "true", "sort": "asc", "limit": 50000, "apiKey": POLYGON_KEY}
-            
-            response = requests.get(url, params=params)
-            data = response.json()
-            
-            if data.get('status') != 'OK' or 'results' not in data:
-                return None
-                
-            df = pd.DataFrame(data['results'])
-            df['date'] = pd.to_datetime(df['t'], unit='ms')
-            df.set_index('date', inplace=True)
-            df.rename(columns={'c': 'Close'}, inplace=True)
-            return df[['Close']]
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass  # Raced with another session, or read-only.
+
+@st.cache_data(ttl=FETCH_TTL, show_spinner=False)
+def _fetch_data(ticker, source, start_date, end_date):
+    """
+    Cached download keyed on (ticker, source, start_date, end_date).
+    Memory (st.cache_data) -> on-disk parquet (survives restarts, same TTL) -> network.
+    Raises on failure so errors are never cached; `get_data` maps them to None.
+    """
+    _fetch_counters()["misses"] += 1
+    path = _disk_cache_path(ticker, source, start_date, end_date)
+    # The key ends today, so a file written intraday holds a partial bar: only trust it for the TTL.
+    if os.path.exists(path) and os.path.getmtime(path) > time.time() - FETCH_TTL:
+        try:
+            return pd.read_parquet(path)
+        except Exception:
+            pass  # Corrupt/partial file: fall through and refetch.
+    df = _download(ticker, source, start_date, end_date)
+    if df is not None:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _prune_disk_cache(os.path.dirname(path))
+            df.to_parquet(path)
+        except Exception:
+            pass  # Read-only deploys still work off the in-memory tier.
+    return df
+
+def _download(ticker, source, start_date, end_date):
+    """Network fetch of daily closes; returns a `Close` DataFrame or None if no data."""
+    if source == "Polygon":
+        if not POLYGON_KEY:
+            raise RuntimeError("Missing Polygon API key. Set `POLYGON_KEY` in Streamlit Secrets (or env var POLYGON_KEY).")
+        s_date = start_date.strftime("%Y-%m-%d")
+        e_date = end_date.strftime("%Y-%m-%d")
+        url = f"https://api.polygon.io/v2/aggs/ticker/{ticker}/range/1/day/{s_date}/{e_date}"
+        params = {"adjusted": "true", "sort": "asc", "limit": 50000, "apiKey": POLYGON_KEY}
+        
+        response = http_session().get(url, params=params, timeout=(3, 10))
+        data = orjson.loads(response.content)
+        
+        if data.get('status') != 'OK':
+            # Rate limits, bad keys, etc. must raise: a returned None would be cached for the TTL.
+            raise RuntimeError(f"Polygon {data.get('status')}: {data.get('error') or data.get('message')}")
+        if 'results' not in data:
+            return None
             
-        elif source == "YFinance":
-            df = yf.download(ticker, start=start_date, end=end_date, progress=False)
-            if df.empty: return None
-            if isinstance(df.columns, pd.MultiIndex):
-                df = df.xs('Close', axis=1, level=0)
-                df.columns = ['Close']
-            else:
-                df = df[['Close']]
-            return df
+        # Only timestamp + close are used; skip materializing the other o/h/l/v/vw/n columns.
+        res = data['results']
+        n = len(res)
+        ts = np.empty(n, dtype='int64')
+        close = np.empty(n, dtype='float64')
+        for i, row in enumerate(res):
+            ts[i] = row['t']
+            close[i] = row['c']
+        idx = pd.DatetimeIndex(pd.to_datetime(ts, unit='ms'), name='date')
+        return pd.DataFrame({'Close': close}, index=idx)
+        
+    elif source == "YFinance":
+        # yfinance treats `end` as exclusive; bump a day so today's bar is kept.
+        df = yf.download(ticker, start=start_date, end=end_date + timedelta(days=1), progress=False)
+        if df.empty: return None
+        if isinstance(df.columns, pd.MultiIndex):
+            df = df.xs('Close', axis=1, level=0)
+            df.columns = ['Close']
+        else:
+            df = df[['Close']]
+        return df
+
+def get_data(ticker, source, start_date, end_date):
+    _fetch_counters()["calls"] += 1
+    try:
+        # Round to calendar dates so the cache key is stable across reruns.
+        return _fetch_data(ticker, source, pd.Timestamp(start_date).date(), pd.Timestamp(end_date).date())
     except Exception:
         return None
 
-def calculate_garch_vol(returns):
-    am = arch_model(returns * 100, vol='Garch', p=1, o=0, q=1, dist='Normal')
-    res = am.fit(disp='off')
-    return (res.conditional_volatility / 100)
+def _series_fingerprint(s: pd.Series) -> tuple:
+    """Cheap cache key for a return series: span, length, endpoints and sum (avoids hashing every value)."""
+    if s.empty:
+        return (0,)
+    return (s.index[0], s.index[-1], len(s), float(s.iloc[0]), float(s.iloc[-1]), float(s.sum()))
 
-def calculate_cvar(returns, position_size=1000, confidence=0.95, horizon_days=1):
+def _garch11_backcast(r: np.ndarray) -> float:
+    """Exponentially weighted backcast of the initial variance (as in `arch`)."""
+    tau = min(75, r.size)
+    w = 0.94 ** np.arange(tau)
+    return float(np.dot(w / w.sum(), (r[:tau] - r.mean()) ** 2))
+
+@st.cache_data(ttl=60*60*24*7, show_spinner=False, hash_funcs={pd.Series: _series_fingerprint})
+def fit_garch11_params(returns: pd.Series) -> np.ndarray:
     """
-    Historical CVaR (Expected Shortfall) using empirical tail mean.
-    - `returns` is expected to be a series of 1-day log returns.
-    - For multi-day CVaR, we compute the *actual* horizon return using a rolling window:
-        horizon_logret = sum(log returns over horizon)
-        horizon_simple = exp(horizon_logret) - 1
-      then take the mean of returns in the (1-confidence) tail.
+    QMLE of the constant-mean GARCH(1,1) on `returns` in percent: (mu, omega, alpha, beta).
+    Same model as `arch_model(returns*100, vol='Garch', p=1, q=1)`, with a Numba likelihood.
     """
-    r = pd.Series(returns).dropna()
-    if r.empty:
-        return None
+    r = returns.to_numpy(dtype=float) * 100  # Scale to percent for a well-conditioned fit.
+    backcast = _garch11_backcast(r)
+    var = r.var()
+    x0 = np.array([r.mean(), var * (1 - 0.9 - 0.05), 0.05, 0.9])
+    bounds = [(-10 * abs(r.mean()) - 1e-6, 10 * abs(r.mean()) + 1e-6), (1e-12, 10 * var), (0.0, 1.0), (0.0, 1.0)]
+    stationarity = {"type": "ineq", "fun": lambda p: 1.0 - 1e-6 - p[2] - p[3]}
+    res = minimize(garch11_negloglik, x0, args=(r, backcast), method="SLSQP",
+                   bounds=bounds, constraints=[stationarity], options={"maxiter": 200, "ftol": 1e-9})
+    return res.x
 
-    if horizon_days <= 1:
-        horizon_simple = np.expm1(r)
-    else:
-        horizon_log = r.rolling(horizon_days).sum().dropna()
-        if horizon_log.empty:
-            return None
-        horizon_simple = np.expm1(horizon_log)
+def calculate_garch_vol(returns):
+    """
+    GARCH(1,1) conditional volatility (constant mean, normal QMLE).
+    Parameters move on a monthly rather than daily timescale, so they are fitted on whole
+    weeks ending with the last completed week (a window that stays fixed for a rolling
+    history all week) and reused from cache; the cheap variance recursion then runs
+    over all of `returns` every time.
+    Returns a Series of daily vol (fraction) indexed like `returns`.
+    """
+    idx = returns.index
+    week_end = idx[-1].normalize() - pd.Timedelta(days=idx[-1].weekday() + 1)  # last Sunday
+    n_weeks = (idx[-1] - idx[0]).days // 7 - 1  # one week of slack for the moving start
+    fit_ret = returns.loc[week_end - pd.Timedelta(weeks=n_weeks) + pd.Timedelta(days=1):week_end]
+    if len(fit_ret) < 250:  # Short history: fit on everything rather than a stub.
+        fit_ret = returns
+    params = fit_garch11_params(fit_ret)
+    r = returns.to_numpy(dtype=float) * 100
+    sigma2 = garch11_sigma2(params, r, _garch11_backcast(r))
+    return pd.Series(np.sqrt(sigma2) / 100, index=idx)
+
+def risk_metrics(logret, horizons=(1, 10, 21), conf=0.95, pos=1000.0) -> dict:
+    """
+    Historical VaR and CVaR (Expected Shortfall) for several horizons in one pass.
+    - `logret` is expected to be a series/array of 1-day log returns (NaNs are dropped).
+    - VaR is the (1-conf) empirical quantile (method='lower', an observed return) of the
+      horizon simple returns; CVaR is the mean
+      of returns at or below that cutoff. Both are reported as absolute USD on `pos`.
+    Returns {horizon: {"var": float|None, "cvar": float|None}}.
+    """
+    r = np.asarray(logret, dtype=float)
+    r = r[~np.isnan(r)]
+    out = {}
+    for h in horizons:
+        var_cutoff, tail_mean = var_cvar_kernel(r, int(h), float(conf))
+        out[h] = {
+            "var": float(abs(var_cutoff) * pos) if not np.isnan(var_cutoff) else None,
+            "cvar": float(abs(tail_mean) * pos) if not np.isnan(tail_mean) else None,
+        }
+    return out
 
-    var_cutoff = np.percentile(horizon_simple, (1 - confidence) * 100)
-    tail = horizon_simple[horizon_simple <= var_cutoff]
-    if len(tail) == 0:
-        return None
-    cvar_usd = abs(float(np.mean(tail))) * position_size
-    return float(cvar_usd)
+def calculate_cvar(returns, position_size=1000, confidence=0.95, horizon_days=1):
+    """Historical CVaR (Expected Shortfall) for a single horizon; see `risk_metrics`."""
+    return risk_metrics(returns, (horizon_days,), confidence, position_size)[horizon_days]["cvar"]
 
 def calculate_var(returns, position_size=1000, confidence=0.95, horizon_days=1):
+    """Historical VaR for a single horizon; see `risk_metrics`."""
+    return risk_metrics(returns, (horizon_days,), confidence, position_size)[horizon_days]["var"]
+
+def calculate_ols_hedge_ratio(log_x: np.ndarray, log_y: np.ndarray, index: pd.Index):
     """
-    Historical VaR using empirical quantile of returns.
-    - `returns` is expected to be a series of 1-day log returns.
-    - For multi-day VaR, we compute the *actual* horizon return using a rolling window:
-        horizon_logret = sum(log returns over horizon)
-        horizon_simple = exp(horizon_logret) - 1
-      then take the (1-confidence) quantile of horizon_simple.
+    Regress log X on log Y (with intercept); returns (residual spread on `index`, alpha, beta).
+    Takes precomputed log prices so callers can reuse them (e.g. for log returns).
     """
-    r = pd.Series(returns).dropna()
-    if r.empty:
-        return None
+    # Two-parameter OLS in closed form: beta = cov(y, x) / var(y), alpha = mean(x) - beta * mean(y).
+    mx, my = log_x.mean(), log_y.mean()
+    dy = log_y - my
+    beta = (dy @ (log_x - mx)) / (dy @ dy)
+    alpha = mx - beta * my
+    spread = pd.Series(log_x - (alpha + beta * log_y), index=index)
+    return spread, float(alpha), float(beta)
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.Series: _series_fingerprint})
+def align_pair(close_x: pd.Series, close_y: pd.Series) -> tuple:
+    """
+    Tab 2 pair setup, cached per pair of price histories: align the legs on common
+    dates as plain arrays (no concat/MultiIndex frame), take log prices once and derive
+    both the hedge fit and the 1-day log returns for the rolling correlation (NaN on
+    the first bar, so they stay aligned with `pair_idx`). The spread is also returned
+    sorted, so its percentile rank is a binary search on every rerun.
+    Returns (pair_idx, x_ret, y_ret, spread, sorted_spread, alpha, beta).
+    """
+    pair_idx = close_x.index.intersection(close_y.index)
+    px_x = close_x.reindex(pair_idx).to_numpy(dtype=float)
+    px_y = close_y.reindex(pair_idx).to_numpy(dtype=float)
+    both = ~(np.isnan(px_x) | np.isnan(px_y))
+    pair_idx, px_x, px_y = pair_idx[both], px_x[both], px_y[both]
+    log_x = np.log(px_x)
+    log_y = np.log(px_y)
+    spread, alpha, beta = calculate_ols_hedge_ratio(log_x, log_y, pair_idx)
+    x_ret = np.diff(log_x, prepend=np.nan)
+    y_ret = np.diff(log_y, prepend=np.nan)
+    sorted_spread = np.sort(spread.to_numpy())
+    return pair_idx, x_ret, y_ret, spread, sorted_spread, alpha, beta
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.Series: _series_fingerprint})
+def stationarity_pvalues(series: pd.Series, pair_key: tuple) -> tuple:
+    """
+    ADF and KPSS (level-stationary) p-values using a fixed Schwert lag
+    `int(12 * (n/100)**0.25)` instead of an information-criterion lag search.
+    `pair_key` (e.g. the tickers) is only part of the cache key.
+    Both are NaN when the sample is too short for the ADF regression.
+    """
+    n = len(series)
+    # statsmodels' adfuller cap (nobs // 2 - ntrend - 1): keeps more rows than regressors.
+    lags = min(int(12 * (n / 100) ** 0.25), n // 2 - 2)
+    if lags < 0:
+        return float("nan"), float("nan")
+    arr = series.to_numpy(dtype=float)
+    # Test statistics come from the Numba kernels; statsmodels only supplies the
+    # MacKinnon surface for ADF. KPSS interpolates Kwiatkowski et al. (1992) Table 1,
+    # clipped to its 0.01-0.10 range like statsmodels' `kpss`.
+    adf_p = mackinnonp(adf_tstat_kernel(arr, lags), regression='c', N=1)
+    kpss_p = np.interp(kpss_stat_kernel(arr, lags), [0.347, 0.463, 0.574, 0.739], [0.10, 0.05, 0.025, 0.01])
+    return float(adf_p), float(kpss_p)
+
+@st.cache_resource(max_entries=32)
+def _normal_plotting_positions(n: int) -> np.ndarray:
+    """
+    Standard-normal Q-Q quantiles for `n` points, memoized by length (it rarely changes
+    between reruns; a plain lru_cache would not survive the script re-exec). Weibull
+    positions i/(n+1) keep the theoretical tails growing with n; ndtri is the bare
+    inverse normal CDF (no rv_continuous dispatch like stats.norm.ppf).
+    The shared array is returned read-only.
+    """
+    theo = ndtri(np.arange(1, n + 1) / (n + 1))
+    theo.setflags(write=False)
+    return theo
 
-    if horizon_days <= 1:
-        horizon_simple = np.expm1(r)
-    else:
-        horizon_log = r.rolling(horizon_days).sum().dropna()
-        if horizon_log.empty:
-            return None
-        horizon_simple = np.expm1(horizon_log)
-
-    var_cutoff = np.percentile(horizon_simple, (1 - confidence) * 100)
-    var_usd = abs(var_cutoff) * position_size
-    return float(var_usd)
-
-def calculate_ols_hedge_ratio(series_x, series_y):
-    log_x = np.log(series_x)
-    log_y = np.log(series_y)
-    X = sm.add_constant(log_y)
-    model = sm.OLS(log_x, X).fit()
-    alpha = model.params.iloc[0]
-    beta = model.params.iloc[1]
-    spread = log_x - (alpha + beta * log_y)
-    return spread, alpha, beta
+@st.cache_data(show_spinner=False)
+def distribution_panel(vals: np.ndarray) -> dict:
+    """
+    Everything the distribution panel needs from one sort: sorted values and their
+    normal-theory quantiles (Q-Q), mean/std, 50-bin histogram, box-plot quartiles/fences
+    plus the points beyond them, and the Jarque-Bera p-value.
+    """
+    s = np.sort(vals)
+    theo = _normal_plotting_positions(s.size)
+    q1, median, q3 = np.quantile(s, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    # Whiskers end at the furthest observations within 1.5 IQR (Plotly's default rule).
+    lo_i = np.searchsorted(s, q1 - 1.5 * iqr, side='left')
+    hi_i = np.searchsorted(s, q3 + 1.5 * iqr, side='right') - 1
+    counts, edges = np.histogram(s, bins=50)
+    _, jb_p = stats.jarque_bera(s)
+    return {
+        "sorted": s,
+        "theo_scaled": theo * s.std() + s.mean(),
+        "mean": float(s.mean()),
+        "std": float(s.std()),
+        "counts": counts,
+        "edges": edges,
+        "box": {"q1": q1, "median": median, "q3": q3, "lowerfence": s[lo_i], "upperfence": s[hi_i],
+                "outliers": np.concatenate((s[:lo_i], s[hi_i + 1:]))},
+        "jb_p": float(jb_p),
+    }
+
+@st.cache_data(show_spinner=False)
+def fast_acf(x: np.ndarray, nlags: int) -> np.ndarray:
+    """Sample autocorrelation for lags 0..nlags via a zero-padded rFFT (O(N log N))."""
+    x = x - x.mean()
+    n = x.size
+    f = np.fft.rfft(x, n=2 * n)
+    r = np.fft.irfft(f * np.conj(f))[:nlags + 1]
+    return r / r[0]
 
 def get_seasonality_composite(df, window_type="Month"):
-    df = df.copy()
-    df['Year'] = df.index.year
-    df['Month'] = df.index.month
-    df['Quarter'] = df.index.quarter
-    current_date = df.index[-1]
+    # Calendar fields as plain local arrays; nothing is written back into `df`.
+    idx = df.index
+    current_date = idx[-1]
+    years = idx.year.to_numpy()
+    if window_type == "Month":
+        in_window = idx.month.to_numpy() == current_date.month
+    else:
+        in_window = idx.quarter.to_numpy() == current_date.quarter
     
-    season_data = {}
     # Use the last 10 *available* completed years from the data (avoid assuming full history exists).
-    available_years = sorted(int(y) for y in df['Year'].dropna().unique())
-    years = [y for y in available_years if y < current_date.year][-10:]
-    valid_years = []
-    
-    for y in years:
-        if window_type == "Month":
-            mask = (df['Year'] == y) & (df['Month'] == current_date.month)
-        else:
-            mask = (df['Year'] == y) & (df['Quarter'] == current_date.quarter)
-            
-        period_df = df[mask].copy()
-        if len(period_df) > 5:
-            start_price = period_df['Close'].iloc[0]
-            period_df['CumRet'] = (period_df['Close'] / start_price) - 1
-            period_df['DayIndex'] = range(len(period_df))
-            season_data[y] = period_df.set_index('DayIndex')['CumRet']
-            valid_years.append(y)
-
-    season_df = pd.DataFrame(season_data)
+    available_years = np.unique(years)
+    hist_years = available_years[available_years < current_date.year][-10:]
+    hist = df['Close'][in_window & np.isin(years, hist_years)]
+
+    # One groupby over (year) builds every year's cumulative path, aligned by day-within-window.
+    by_year = hist.groupby(hist.index.year)
+    paths = pd.DataFrame({
+        'Year': hist.index.year,
+        'DayIndex': by_year.cumcount().to_numpy(),
+        'CumRet': (hist / by_year.transform('first') - 1).to_numpy(),
+    })
+    paths = paths[by_year.transform('size').to_numpy() > 5]
+    season_df = paths.pivot(index='DayIndex', columns='Year', values='CumRet')
     if season_df.empty:
         return None, None, None, None, None, 0, 0
 
     # Use each year's last available cumulative return (month/quarter lengths vary).
-    final_rets = season_df.apply(
-        lambda s: s.dropna().iloc[-1] if s.dropna().size else np.nan,
-        axis=0,
-    ).dropna()
+    final_rets = season_df.ffill().iloc[-1].dropna()
     n_years = int(final_rets.shape[0])
     win_rate = float((final_rets > 0).mean()) if n_years else None
 
@@ -264,38 +432,104 @@ def get_seasonality_composite(df, window_type="Month"):
     else:
         filtered_years = [int(y) for y in final_rets.index]
 
-    filtered_df = season_df[filtered_years]
-    counts = filtered_df.count(axis=1)
-
-    avg_curve = filtered_df.mean(axis=1, skipna=True).where(counts >= 1)
+    arr = season_df[filtered_years].to_numpy(dtype=float)
+    counts = np.count_nonzero(~np.isnan(arr), axis=1)
     # Month/quarter lengths differ across years; once some years end, fewer observations remain.
     # Keep the band visible as long as we have at least 2 years (or 1 if only 1 exists).
     band_min_years = 2 if n_years >= 2 else 1
-    p20 = filtered_df.quantile(0.20, axis=1).where(counts >= band_min_years)
-    p80 = filtered_df.quantile(0.80, axis=1).where(counts >= band_min_years)
+    with warnings.catch_warnings():
+        # Trailing days covered only by trimmed years are all-NaN rows; they are masked below.
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        mean = np.nanmean(arr, axis=1)
+        q20, q80 = np.nanpercentile(arr, [20, 80], axis=1)
+    band_ok = counts >= band_min_years
+    avg_curve = pd.Series(np.where(counts >= 1, mean, np.nan), index=season_df.index)
+    p20 = pd.Series(np.where(band_ok, q20, np.nan), index=season_df.index)
+    p80 = pd.Series(np.where(band_ok, q80, np.nan), index=season_df.index)
     
-    if window_type == "Month":
-        curr_mask = (df['Year'] == current_date.year) & (df['Month'] == current_date.month)
-    else:
-        curr_mask = (df['Year'] == current_date.year) & (df['Quarter'] == current_date.quarter)
-    
-    curr_df = df[curr_mask].copy()
-    if not curr_df.empty:
-        curr_df['CumRet'] = (curr_df['Close'] / curr_df['Close'].iloc[0]) - 1
-        curr_df['DayIndex'] = range(len(curr_df))
-        current_curve = curr_df.set_index('DayIndex')['CumRet']
+    curr_close = df['Close'][in_window & (years == current_date.year)]
+    if not curr_close.empty:
+        current_curve = pd.Series(
+            curr_close.to_numpy() / curr_close.iloc[0] - 1,
+            index=pd.RangeIndex(len(curr_close), name='DayIndex'),
+            name='CumRet',
+        )
     else:
         current_curve = pd.Series(dtype=float)
         
     return current_curve, avg_curve, p20, p80, win_rate, n_years, band_min_years
 
-def calculate_drawdown(series):
-    roll_max = series.cummax()
-    # Avoid division by zero
-    drawdown = np.where(roll_max != 0, (series / roll_max) - 1, 0)
-    return pd.Series(drawdown, index=series.index)
+@st.cache_data(show_spinner=False, hash_funcs={pd.Series: _series_fingerprint})
+def compute_tab1_signals(close: pd.Series, roll_win: int = 126) -> pd.DataFrame:
+    """
+    Tab 1 signal pipeline, cached per price history:
+    Box-Cox -> linear detrend -> rolling z-score (`Z`), 1-day log returns (`LogRet`) and
+    GARCH(1,1) conditional vol (`GARCH`). The first row (no return) is dropped.
+    """
+    df_sig = close.to_frame('Close')
+    # Log prices computed once: they give the log returns and double as the Box-Cox
+    # positivity mask for the lambda fit (log is finite only for strictly positive prices).
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_close = np.log(df_sig['Close'].to_numpy(dtype=float))
+    close_arr = df_sig['Close'].to_numpy(dtype=float)
+    # Only the lambda MLE stays in SciPy; transform + detrend + rolling z run as one kernel.
+    lmbda = stats.boxcox_normmax(close_arr[np.isfinite(log_close)], method='mle')
+    df_sig['Z'] = boxcox_detrend_z_kernel(close_arr, float(lmbda), roll_win)
+    df_sig['LogRet'] = np.concatenate(([np.nan], np.diff(log_close)))
+    df_sig.dropna(subset=['LogRet'], inplace=True)
+    df_sig['GARCH'] = calculate_garch_vol(df_sig['LogRet'])
+    return df_sig
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.Series: _series_fingerprint})
+def prepare_tab1_signals(log_ret: pd.Series, close: pd.Series) -> dict:
+    """
+    Pre-rolled inputs for the PM signal block, cached per history:
+    trailing 7D log-return sums (`r7`) and their std, forward 7D simple returns (`fwd7`,
+    aligned to the start of the horizon) and the 20D high-low range as a share of the
+    20D mean price (`range20`). Arrays are positional: `r7`/`fwd7` follow `log_ret`,
+    `range20` follows `close`.
+    """
+    lr = log_ret.to_numpy(dtype=float)
+    r7 = np.full(lr.size, np.nan)
+    if lr.size >= 7:
+        r7[6:] = np.convolve(lr, np.ones(7), 'valid')
+    # The forward sum over t+1..t+7 is the trailing sum that ends 7 bars later.
+    fwd7 = np.full(lr.size, np.nan)
+    fwd7[:-7] = np.expm1(r7[7:])
+
+    range20 = range_ratio_kernel(close.to_numpy(dtype=float), 20)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        r7_std = float(np.nanstd(r7, ddof=1))
+    return {"r7": r7, "r7_std": r7_std, "fwd7": fwd7, "range20": range20}
+
+def calculate_drawdown(log_series):
+    """Drawdown (fraction, <= 0) of the level whose log is `log_series`."""
+    return pd.Series(drawdown_kernel(log_series.to_numpy(dtype=float)), index=log_series.index)
+
+@st.cache_resource(max_entries=16, hash_funcs={pd.Series: _series_fingerprint})
+def spread_drawdown_figure(spread_2y: pd.Series) -> go.Figure:
+    """
+    Tab 2 main chart (spread over its drawdown). make_subplots and trace validation
+    dominate its cost, so the assembled Figure is kept as a resource per spread and
+    handed back as-is (no pickle round-trip); callers must not mutate it.
+    """
+    dd_2y = calculate_drawdown(spread_2y)
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3], subplot_titles=("Spread Performance (Log-OLS)", "Drawdown Risk"))
+    fig.add_trace(go.Scattergl(x=spread_2y.index, y=spread_2y, name="Spread", line=dict(color='cyan')), row=1, col=1)
+    fig.add_trace(go.Scattergl(x=dd_2y.index, y=dd_2y, name="Drawdown", fill='tozeroy', line=dict(color='red')), row=2, col=1)
+    fig.update_layout(template="plotly_dark", height=600)
+    return fig
+
+@st.cache_resource
+def _warmup_kernels() -> bool:
+    """Front-load the Numba kernels' dispatch once per process (see `kernels.warmup`)."""
+    kernels.warmup()
+    return True
 
 # --- MAIN DASHBOARD ---
+_warmup_kernels()
 st.title("Bullshet Screener")
 
 tab1, tab2 = st.tabs(["Single Stock (Valuation Screen)", "Spread (Relative Value Screen)"])
@@ -313,7 +547,13 @@ with tab1:
     
     if active:
         end = datetime.now()
-        start = end - timedelta(days=365*12) 
+        # 11y covers the 10 prior completed years seasonality needs (+ current year); signals use the last 4y.
+        start = end - timedelta(days=365*11)
+        # The earnings calendar doesn't depend on the price history: fetch it in the
+        # background so its round-trip overlaps the price download and signal pipeline.
+        pool = thread_pool(1)
+        fut_earnings = pool.submit(get_earnings_dates_yf, active)
+        pool.shutdown(wait=False)
         df = get_data(active, source, start, end)
         
         if df is not None:
@@ -340,22 +580,12 @@ with tab1:
             )
             
             # Logic
-            df_sig = df[df.index >= end - timedelta(days=365*4)].copy()
-            clean_p = df_sig['Close'][df_sig['Close'] > 0]
-            transformed, lmbda = stats.boxcox(clean_p)
-            detrended = signal.detrend(transformed)
-            df_sig.loc[clean_p.index, 'BC_Detrended'] = detrended
-            roll_win = 126 
-            df_sig['Z'] = (df_sig['BC_Detrended'] - df_sig['BC_Detrended'].rolling(roll_win).mean()) / df_sig['BC_Detrended'].rolling(roll_win).std()
-            df_sig['LogRet'] = np.log(df_sig['Close'] / df_sig['Close'].shift(1))
-            df_sig.dropna(subset=['LogRet'], inplace=True)
-            garch_vol = calculate_garch_vol(df_sig['LogRet'])
-            df_sig['GARCH'] = garch_vol
-            df_viz = df_sig[df_sig.index >= end - timedelta(days=365*2)]
+            df_sig = compute_tab1_signals(df['Close'].loc[end - timedelta(days=365*4):])
+            df_viz = df_sig.loc[end - timedelta(days=365*2):]
             
             fig_risk = make_subplots(specs=[[{"secondary_y": True}]])
-            fig_risk.add_trace(go.Scatter(x=df_viz.index, y=df_viz['Z'], name="Valuation Z-Score", line=dict(color='cyan', width=1.5)), secondary_y=False)
-            fig_risk.add_trace(go.Scatter(x=df_viz.index, y=df_viz['GARCH'], name="Risk Regime (Vol)", line=dict(color='orange', width=1, dash='dot')), secondary_y=True)
+            fig_risk.add_trace(go.Scattergl(x=df_viz.index, y=df_viz['Z'], name="Valuation Z-Score", line=dict(color='cyan', width=1.5)), secondary_y=False)
+            fig_risk.add_trace(go.Scattergl(x=df_viz.index, y=df_viz['GARCH'], name="Risk Regime (Vol)", line=dict(color='orange', width=1, dash='dot')), secondary_y=True)
             fig_risk.add_hrect(y0=2, y1=5, fillcolor="red", opacity=0.1, line_width=0, secondary_y=False)
             fig_risk.add_hrect(y0=-5, y1=-2, fillcolor="green", opacity=0.1, line_width=0, secondary_y=False)
             fig_risk.add_hline(y=0, line_color="white", line_width=0.5, line_dash="dot", secondary_y=False)
@@ -405,45 +635,46 @@ with tab1:
             )
 
             # Use longer history for analog matching (same data used to compute Z/returns), if available.
-            hist_df = df_sig.copy()
-            r7 = hist_df['LogRet'].rolling(7).sum()
-            curr_r7 = r7.iloc[-1]
-            r7_std = r7.std()
+            hist_df = df_sig  # read-only below; no defensive copy needed
+            hist_idx = hist_df.index
+            pm = prepare_tab1_signals(hist_df['LogRet'], df_viz['Close'])
+            # Matching runs on plain float64 arrays (positional on hist_idx); no index alignment.
+            r7 = pm["r7"]
+            curr_r7 = r7[-1]
+            r7_std = pm["r7_std"]
             r7_tol = 0.5 * r7_std if pd.notna(r7_std) else 0.0
 
-            z_series = hist_df['Z']
-            curr_z = z_series.iloc[-1]
+            z_arr = hist_df['Z'].to_numpy()
+            curr_z = z_arr[-1]
             z_tol = 0.5
 
-            event_mask = (r7 - curr_r7).abs() <= r7_tol
-            event_mask &= (z_series - curr_z).abs() <= z_tol
-            event_idx = r7.index[event_mask].intersection(r7.dropna().index)
-
-            fwd7 = forward_simple_returns_from_log(hist_df['LogRet'], 7)
-            event_idx = event_idx[event_idx <= fwd7.dropna().index.max()] if not fwd7.dropna().empty else pd.DatetimeIndex([])
-            event_idx = select_non_overlapping_by_bars(hist_df.index, event_idx, horizon_bars=7)
+            fwd7 = pm["fwd7"]
+            # Positions come back ascending, so the 7-bar non-overlap scan runs on them directly.
+            ev_pos = analog_positions_kernel(r7, z_arr, fwd7, curr_r7, curr_z, r7_tol, z_tol)
+            ev_pos = greedy_nonoverlap_kernel(ev_pos, 7)
 
-            if len(event_idx) > 0:
-                avg_fwd7 = fwd7.loc[event_idx].mean()
-                hit_rate = (fwd7.loc[event_idx] > 0).mean()
+            if ev_pos.size > 0:
+                ev_fwd7 = fwd7[ev_pos]
+                avg_fwd7 = ev_fwd7.mean()
+                hit_rate = (ev_fwd7 > 0).mean()
             else:
                 avg_fwd7 = np.nan
                 hit_rate = np.nan
 
             # Tight handle proxy: 20D range as % of price
-            range20 = (df_viz['Close'].rolling(20).max() - df_viz['Close'].rolling(20).min()) / df_viz['Close'].rolling(20).mean()
-            curr_range20 = range20.iloc[-1]
-            range_pct = percentile_rank(range20.dropna(), curr_range20)
+            range20 = pm["range20"]
+            range_pct = percentile_rank(range20, range20[-1])
 
             # Earnings flag share (best-effort)
-            earnings_dates = get_earnings_dates_yf(active) if active else None
+            earnings_dates = fut_earnings.result()
             earnings_flag_pct = None
-            if earnings_dates is not None and len(event_idx) > 0:
-                flags = []
-                for dt in event_idx:
-                    end_dt = dt + pd.Timedelta(days=7)
-                    flags.append(((earnings_dates >= dt.normalize()) & (earnings_dates <= end_dt.normalize())).any())
-                earnings_flag_pct = float(np.mean(flags)) if flags else None
+            if earnings_dates is not None and ev_pos.size > 0:
+                # Count earnings dates inside each [dt, dt+7d] window via two binary searches.
+                event_idx = hist_idx[ev_pos]
+                ed = np.sort(earnings_dates.to_numpy())
+                lo = np.searchsorted(ed, event_idx.normalize().to_numpy(), side='left')
+                hi = np.searchsorted(ed, (event_idx + pd.Timedelta(days=7)).normalize().to_numpy(), side='right')
+                earnings_flag_pct = float(np.mean(hi > lo))
 
             bias = "Neutral"
             if curr_z <= -1.5 and curr_r7 >= 0:
@@ -487,9 +718,9 @@ with tab1:
                 """,
             )
 
-            var_1d = calculate_var(df_viz['LogRet'], position_size=1000, confidence=0.95, horizon_days=1)
-            var_10d = calculate_var(df_viz['LogRet'], position_size=1000, confidence=0.95, horizon_days=10)
-            var_1m = calculate_var(df_viz['LogRet'], position_size=1000, confidence=0.95, horizon_days=21)
+            viz_log_ret = df_viz['LogRet'].to_numpy()  # already NaN-free (dropna above)
+            risk = risk_metrics(viz_log_ret, horizons=(1, 10, 21), conf=0.95, pos=1000.0)
+            var_1d, var_10d, var_1m = (risk[h]["var"] for h in (1, 10, 21))
             v1, v2, v3 = st.columns(3)
             v1.metric("1-Day VaR (95%)", f"${var_1d:.2f}" if var_1d is not None else "N/A")
             v2.metric("10-Day VaR (95%)", f"${var_10d:.2f}" if var_10d is not None else "N/A")
@@ -514,9 +745,7 @@ with tab1:
                 """,
             )
             
-            cvar_1d = calculate_cvar(df_viz['LogRet'], position_size=1000, confidence=0.95, horizon_days=1)
-            cvar_10d = calculate_cvar(df_viz['LogRet'], position_size=1000, confidence=0.95, horizon_days=10)
-            cvar_1m = calculate_cvar(df_viz['LogRet'], position_size=1000, confidence=0.95, horizon_days=21)
+            cvar_1d, cvar_10d, cvar_1m = (risk[h]["cvar"] for h in (1, 10, 21))
             m1, m2, m3, m4 = st.columns(4)
             m1.metric("1-Day CVaR (95%)", f"${cvar_1d:.2f}" if cvar_1d is not None else "N/A")
             m2.metric("10-Day CVaR (95%)", f"${cvar_10d:.2f}" if cvar_10d is not None else "N/A")
@@ -567,8 +796,9 @@ with tab1:
                 if len(x_band) >= 2:
                     p20_band = p20[band_mask]
                     p80_band = p80[band_mask]
-                    x_fill = list(x_band) + list(x_band[::-1])
-                    y_fill = list(p80_band) + list(p20_band[::-1])
+                    x_band_arr = x_band.to_numpy()
+                    x_fill = np.concatenate([x_band_arr, x_band_arr[::-1]])
+                    y_fill = np.concatenate([p80_band.to_numpy(), p20_band.to_numpy()[::-1]])
                     fig_s.add_trace(go.Scatter(
                         x=x_fill,
                         y=y_fill,
@@ -578,8 +808,8 @@ with tab1:
                         name='Normal Range (20-80%)'
                     ))
 
-                fig_s.add_trace(go.Scatter(x=x_axis, y=avg, mode='lines', name='Typical Path (10Y Avg)', line=dict(color='#FFD700', dash='dash', width=2)))
-                fig_s.add_trace(go.Scatter(x=curr.index, y=curr, mode='lines', name='Current Price Action', line=dict(color='white', width=3)))
+                fig_s.add_trace(go.Scattergl(x=x_axis, y=avg, mode='lines', name='Typical Path (10Y Avg)', line=dict(color='#FFD700', dash='dash', width=2)))
+                fig_s.add_trace(go.Scattergl(x=curr.index, y=curr, mode='lines', name='Current Price Action', line=dict(color='white', width=3)))
                 fig_s.update_layout(title=f"Seasonality: {s_mode} Projection", xaxis_title="Trading Days", yaxis_title="Cumulative Return", template="plotly_dark", height=500)
                 st.plotly_chart(fig_s, use_container_width=True)
 
@@ -615,14 +845,17 @@ with tab2:
     if tx and ty:
         end = datetime.now()
         start = end - timedelta(days=365*7)
-        dfx = get_data(tx, "Polygon", start, end)
-        dfy = get_data(ty, "Polygon", start, end)
+        # Fetch both legs concurrently to overlap the network round-trips.
+        with thread_pool(2) as ex:
+            fut_x = ex.submit(get_data, tx, "Polygon", start, end)
+            fut_y = ex.submit(get_data, ty, "Polygon", start, end)
+            dfx, dfy = fut_x.result(), fut_y.result()
         
         if dfx is not None and dfy is not None:
-            pair = pd.concat([dfx['Close'], dfy['Close']], axis=1, keys=['X', 'Y']).dropna()
-            spread, alpha, beta = calculate_ols_hedge_ratio(pair['X'], pair['Y'])
-            viz_start = end - timedelta(days=365*2)
-            spread_2y = spread[spread.index >= viz_start]
+            pair_idx, x_ret, y_ret, spread, sorted_spread, alpha, beta = align_pair(dfx['Close'], dfy['Close'])
+            # Both 2y views (spread, rolling corr) share one binary search into the pair index.
+            viz_pos = pair_idx.get_slice_bound(end - timedelta(days=365*2), side='left')
+            spread_2y = spread.iloc[viz_pos:]
             st.info(f"**Hedge Ratio:** 1.0 {tx} vs {beta:.3f} {ty}")
 
             # --- PM SIGNAL (SPREAD EXTREMITY) ---
@@ -650,31 +883,38 @@ with tab2:
                 """,
             )
 
-            spread_all = spread.dropna()
-            curr_spread = spread_all.iloc[-1] if not spread_all.empty else np.nan
+            # The aligned spread is NaN-free by construction; every statistic below runs on
+            # this one array and selection happens on integer bar positions.
+            spread_arr = spread.to_numpy(dtype=float)
+            n_bars = spread_arr.size
+            curr_spread = spread_arr[-1] if n_bars else np.nan
             vel_window = 5
-            spread_vel = spread_all.diff(vel_window)
-            curr_vel = spread_vel.iloc[-1] if not spread_vel.empty else np.nan
-            vel_sign = "Widening" if pd.notna(curr_vel) and curr_vel > 0 else "Tightening"
-
-            spread_pct = percentile_rank(spread_all, curr_spread)
-            if pd.notna(spread_pct) and spread_pct >= 50:
-                extreme_mask = spread_all >= curr_spread
+            # 5D velocity as one ufunc over shifted views (NaN for the first 5 bars, like diff).
+            spread_vel = np.full(n_bars, np.nan)
+            np.subtract(spread_arr[vel_window:], spread_arr[:-vel_window], out=spread_vel[vel_window:])
+            curr_vel = spread_vel[-1] if n_bars else np.nan
+            vel_sign = "Widening" if curr_vel > 0 else "Tightening"
+
+            spread_pct = percentile_rank_sorted(sorted_spread, curr_spread)
+            if spread_pct >= 50:
+                extreme_mask = spread_arr >= curr_spread
             else:
-                extreme_mask = spread_all <= curr_spread
-
-            vel_mask = spread_vel > 0 if (pd.notna(curr_vel) and curr_vel > 0) else (spread_vel <= 0)
-            event_idx = spread_all.index[extreme_mask & vel_mask]
-
-            fwd63 = forward_simple_returns_from_loglevel(spread_all, 63)
-            event_idx = event_idx[event_idx <= fwd63.dropna().index.max()] if not fwd63.dropna().empty else pd.DatetimeIndex([])
-            event_idx = select_non_overlapping_by_bars(spread_all.index, event_idx, horizon_bars=63)
-
-            if len(event_idx) > 0:
-                avg_fwd63 = fwd63.loc[event_idx].mean()
-                hit63 = (fwd63.loc[event_idx] > 0).mean()
-                last_hit = event_idx.max()
-                last_hit_days = (spread_all.index[-1] - last_hit).days if last_hit is not None else None
+                extreme_mask = spread_arr <= curr_spread
+
+            # NaN velocities compare False under either test, so the warm-up never matches.
+            vel_mask = spread_vel > 0 if curr_vel > 0 else (spread_vel <= 0)
+            # Forward 3M simple return of the log spread; NaN for the trailing 63 bars.
+            fwd63 = np.full(n_bars, np.nan)
+            fwd63[:-63] = np.expm1(spread_arr[63:] - spread_arr[:-63])
+            # Candidates with a completed 3M outcome, then the greedy non-overlap scan
+            # directly on their positions.
+            ev_pos = np.flatnonzero(extreme_mask & vel_mask & ~np.isnan(fwd63))
+            ev_pos = greedy_nonoverlap_kernel(ev_pos, 63)
+
+            if ev_pos.size > 0:
+                avg_fwd63 = fwd63[ev_pos].mean()
+                hit63 = (fwd63[ev_pos] > 0).mean()
+                last_hit_days = (spread.index[-1] - spread.index[ev_pos[-1]]).days
             else:
                 avg_fwd63 = np.nan
                 hit63 = np.nan
@@ -712,13 +952,7 @@ with tab2:
                 """,
             )
             
-            spread_price = np.exp(spread_2y)
-            dd_2y = calculate_drawdown(spread_price)
-            fig_main = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3], subplot_titles=("Spread Performance (Log-OLS)", "Drawdown Risk"))
-            fig_main.add_trace(go.Scatter(x=spread_2y.index, y=spread_2y, name="Spread", line=dict(color='cyan')), row=1, col=1)
-            fig_main.add_trace(go.Scatter(x=dd_2y.index, y=dd_2y, name="Drawdown", fill='tozeroy', line=dict(color='red')), row=2, col=1)
-            fig_main.update_layout(template="plotly_dark", height=600)
-            st.plotly_chart(fig_main, use_container_width=True)
+            st.plotly_chart(spread_drawdown_figure(spread_2y), use_container_width=True)
             
             # --- 2. STATS ---
             st.markdown("#### 2. Stationarity Tests (Stability Check)")
@@ -744,18 +978,28 @@ with tab2:
             )
             
             clean_s = spread_2y.dropna()
-            adf_res = adfuller(clean_s)
-            kpss_res = kpss(clean_s, regression='c', nlags="auto")
+            clean_vals = clean_s.to_numpy(dtype=float)
+            # The stationarity, distribution and ACF diagnostics are independent; run them
+            # together (the ADF/KPSS kernels release the GIL) and render as they are needed.
+            with thread_pool(3) as ex:
+                fut_stat = ex.submit(stationarity_pvalues, clean_s, (tx, ty))
+                fut_dist = ex.submit(distribution_panel, clean_vals)
+                fut_acf = ex.submit(fast_acf, clean_vals, 40)
+                adf_p, kpss_p = fut_stat.result()
             
             tc1, tc2 = st.columns(2)
             with tc1:
-                st.markdown(f"**ADF p-value:** `{adf_res[1]:.4f}`")
-                if adf_res[1] < 0.05: st.success("Stationary (Stable)")
-                else: st.error("Non-Stationary (Trending)")
+                if np.isnan(adf_p): st.markdown("**ADF p-value:** `N/A` (sample too short)")
+                else:
+                    st.markdown(f"**ADF p-value:** `{adf_p:.4f}`")
+                    if adf_p < 0.05: st.success("Stationary (Stable)")
+                    else: st.error("Non-Stationary (Trending)")
             with tc2:
-                st.markdown(f"**KPSS p-value:** `{kpss_res[1]:.4f}`")
-                if kpss_res[1] < 0.05: st.error("Non-Stationary")
-                else: st.success("Stationary")
+                if np.isnan(kpss_p): st.markdown("**KPSS p-value:** `N/A` (sample too short)")
+                else:
+                    st.markdown(f"**KPSS p-value:** `{kpss_p:.4f}`")
+                    if kpss_p < 0.05: st.error("Non-Stationary")
+                    else: st.success("Stationary")
             
             # --- 3. DISTRIBUTION ---
             st.markdown("#### 3. Distribution & Tail Risk")
@@ -780,24 +1024,38 @@ with tab2:
                 """,
             )
             
-            d1, d2, d3 = st.columns(3)
-            with d1:
-                fig_hist = px.histogram(clean_s, nbins=50, title="Spread Dist", marginal="box")
-                fig_hist.update_layout(showlegend=False, template="plotly_dark", height=300)
-                st.plotly_chart(fig_hist, use_container_width=True)
-            with d2:
-                sorted_s = np.sort(clean_s)
-                theo = stats.norm.ppf(np.linspace(0.01, 0.99, len(sorted_s)))
-                theo_scaled = theo * np.std(sorted_s) + np.mean(sorted_s)
-                fig_qq = go.Figure()
-                fig_qq.add_trace(go.Scatter(x=theo_scaled, y=sorted_s, mode='markers', name='Data'))
-                fig_qq.add_trace(go.Scatter(x=[min(theo_scaled), max(theo_scaled)], y=[min(theo_scaled), max(theo_scaled)], mode='lines', line=dict(color='red')))
-                fig_qq.update_layout(title="Q-Q Plot (Tail Check)", template="plotly_dark", height=300)
-                st.plotly_chart(fig_qq, use_container_width=True)
+            dist = fut_dist.result()
+            # Histogram (+ box marginal) and Q-Q share one figure: one payload instead of two.
+            d12, d3 = st.columns([2, 1])
+            with d12:
+                edges = dist["edges"]
+                box = dist["box"]
+                sorted_s = dist["sorted"]
+                theo_scaled = dist["theo_scaled"]
+                fig_dist = make_subplots(
+                    rows=2, cols=2, specs=[[{}, {"rowspan": 2}], [{}, None]],
+                    shared_xaxes=True, row_heights=[0.25, 0.75], vertical_spacing=0.02,
+                    subplot_titles=("Spread Dist", "Q-Q Plot (Tail Check)"),
+                )
+                fig_dist.add_trace(go.Box(
+                    q1=[box["q1"]], median=[box["median"]], q3=[box["q3"]],
+                    lowerfence=[box["lowerfence"]], upperfence=[box["upperfence"]],
+                    y=["Spread"], orientation='h', marker_color='#636efa',
+                ), row=1, col=1)
+                # Precomputed boxes carry no samples, so draw the points beyond the whiskers ourselves.
+                fig_dist.add_trace(go.Scatter(
+                    x=box["outliers"], y=["Spread"] * box["outliers"].size, mode='markers',
+                    marker=dict(color='#636efa', size=4),
+                ), row=1, col=1)
+                fig_dist.add_trace(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=dist["counts"], width=np.diff(edges)), row=2, col=1)
+                fig_dist.add_trace(go.Scatter(x=theo_scaled, y=sorted_s, mode='markers', name='Data'), row=1, col=2)
+                fig_dist.add_trace(go.Scatter(x=[theo_scaled[0], theo_scaled[-1]], y=[theo_scaled[0], theo_scaled[-1]], mode='lines', line=dict(color='red')), row=1, col=2)
+                fig_dist.update_yaxes(showticklabels=False, row=1, col=1)
+                fig_dist.update_layout(bargap=0, showlegend=False, template="plotly_dark", height=300)
+                st.plotly_chart(fig_dist, use_container_width=True)
             with d3:
-                jb_stat, jb_p = stats.jarque_bera(clean_s)
                 st.markdown("**Jarque-Bera Test**")
-                st.metric("p-value", f"{jb_p:.4e}")
+                st.metric("p-value", f"{dist['jb_p']:.4e}")
             
             # --- 4. ACF ---
             st.markdown("#### 4. Autocorrelation (Memory)")
@@ -820,9 +1078,9 @@ with tab2:
                 """,
             )
             
-            acf_vals = acf(clean_s, nlags=40)
+            acf_vals = fut_acf.result()
             fig_acf = go.Figure()
-            fig_acf.add_trace(go.Bar(x=list(range(len(acf_vals))), y=acf_vals))
+            fig_acf.add_trace(go.Bar(x=np.arange(acf_vals.size), y=acf_vals))
             ci = 1.96/np.sqrt(len(clean_s))
             fig_acf.add_hline(y=ci, line_dash="dash", line_color="red")
             fig_acf.add_hline(y=-ci, line_dash="dash", line_color="red")
@@ -851,11 +1109,17 @@ with tab2:
             )
             
             roll_win = 126
-            pair['X_ret'] = np.log(pair['X']).diff()
-            pair['Y_ret'] = np.log(pair['Y']).diff()
-            pair['Roll_Corr'] = pair['X_ret'].rolling(roll_win).corr(pair['Y_ret'])
-            df_roll_viz = pair[pair.index >= viz_start]
-            fig_rc = px.line(df_roll_viz, y='Roll_Corr', title="Rolling 6-Month Correlation")
+            roll_corr = pd.Series(rolling_corr_kernel(x_ret, y_ret, roll_win), index=pair_idx, name='Roll_Corr')
+            roll_viz = roll_corr.iloc[viz_pos:]
+            fig_rc = go.Figure(go.Scattergl(x=roll_viz.index, y=roll_viz.to_numpy(), mode='lines', name='Roll_Corr'))
             fig_rc.add_hline(y=0, line_dash="dot", line_color="white")
-            fig_rc.update_layout(template="plotly_dark", height=300)
-            st.plotly_chart(fig_rc, use_container_width=True)
\ No newline at end of file
+            fig_rc.update_layout(title="Rolling 6-Month Correlation", template="plotly_dark", height=300)
+            st.plotly_chart(fig_rc, use_container_width=True)
+
+# ==========================================
+# SIDEBAR: CACHE STATS
+# ==========================================
+with st.sidebar.expander("Cache stats", expanded=False):
+    stats_now = cache_stats()
+    st.caption(f"get_data calls: {stats_now['calls']} · misses: {stats_now['misses']}")
+    st.caption(f"Hit rate: {stats_now['hit_rate']*100:.0f}%" if stats_now['hit_rate'] is not None else "Hit rate: N/A")
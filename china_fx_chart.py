@@ -24,60 +24,32 @@ def scrape_fx_settlement():
     
     url = 'https://www.safe.gov.cn/en/2023/0215/2048.html'
     headers = {'User-Agent': 'Mozilla/5.0'}
-    response = requests.get(url, headers=headers, timeout=30)
-    soup = BeautifulSoup(response.content, 'html.parser')
-    
-    excel_url = None
-    for link in soup.find_all('a'):
-        href = link.get('href', '')
-        text = link.get_text(strip=True)
-        if 'Time-series' in text:
-            excel_url = 'https://www.safe.gov.cn' + href
-            break
-    
-    excel_response = requests.get(excel_url, headers=headers, timeout=30)
+    with requests.Session() as session:  # reuse the TLS connection for the workbook download
+        response = session.get(url, headers=headers, timeout=30)
+        soup = BeautifulSoup(response.content, 'html.parser')
+    
+        excel_url = None
+        for link in soup.find_all('a'):
+            href = link.get('href', '')
+            text = link.get_text(strip=True)
+            if 'Time-series' in text:
+                excel_url = 'https://www.safe.gov.cn' + href
+                break
+    
+        excel_response = session.get(excel_url, headers=headers, timeout=30)
     excel_file = BytesIO(excel_response.content)
     df_raw = pd.read_excel(excel_file, sheet_name='in USD (Monthly)')
     
-    # Clean - Row 2 has dates, Row 3+ is data
+    # Clean - Row 2 has dates (Timestamps or date strings), Row 3+ is data
     headers_row = df_raw.iloc[2]
-    new_columns = []
-    for val in headers_row:
-        if pd.isna(val):
-            new_columns.append('Label')
-        elif isinstance(val, pd.Timestamp):
-            new_columns.append(val.strftime('%b %Y'))
-        else:
-            try:
-                dt = pd.to_datetime(val)
-                new_columns.append(dt.strftime('%b %Y'))
-            except:
-                new_columns.append(str(val))
-    
-    df = df_raw.iloc[3:].copy()
-    df.columns = new_columns
-    df = df.reset_index(drop=True)
-    
-    # Get month columns
-    month_cols = [col for col in df.columns if any(m in str(col) for m in 
-                  ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])]
-    
-    # Build arrays manually for rows 22 and 37
-    row_22_vals = []
-    row_37_vals = []
-    valid_months = []
-    
-    for i, col in enumerate(df.columns):
-        if col in month_cols:
-            val_22 = df.iloc[22, i]
-            val_37 = df.iloc[37, i]
-            
-            row_22_vals.append(float(val_22) if pd.notna(val_22) else np.nan)
-            row_37_vals.append(float(val_37) if pd.notna(val_37) else np.nan)
-            valid_months.append(col)
-    
-    row_22_vals = np.array(row_22_vals)
-    row_37_vals = np.array(row_37_vals)
+    month_starts = pd.to_datetime(headers_row, errors='coerce', format='mixed').dt.to_period('M').dt.to_timestamp()
+    is_month = month_starts.notna().to_numpy()
+    
+    df = df_raw.iloc[3:].reset_index(drop=True)
+    
+    # Rows 22 and 37 across the month columns
+    row_22_vals = pd.to_numeric(df.iloc[22, is_month], errors='coerce').to_numpy(dtype=float)
+    row_37_vals = pd.to_numeric(df.iloc[37, is_month], errors='coerce').to_numpy(dtype=float)
     
     # FX Settlement = Row 22 + Row 37 MoM change
     # Data is in 100 million USD, convert to billion USD (divide by 10)
@@ -85,7 +57,7 @@ def scrape_fx_settlement():
     fx_settlement = (row_22_vals + row_37_mom) / 10
     
     # Parse dates
-    dates = pd.to_datetime(valid_months, format='%b %Y')
+    dates = pd.DatetimeIndex(month_starts[is_month])
     
     # Create dataframe
     fx_df = pd.DataFrame({
@@ -7,6 +7,8 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 from io import BytesIO
 import plotly.graph_objects as go
@@ -14,6 +16,7 @@ from plotly.subplots import make_subplots
 import yfinance as yf
 from datetime import datetime
 import os
+import hashlib
 
 st.set_page_config(page_title="China FX Dashboard", page_icon="🇨🇳", layout="wide")
 
@@ -21,12 +24,41 @@ st.set_page_config(page_title="China FX Dashboard", page_icon="🇨🇳", layout
 # DATA FUNCTIONS
 # ============================================================
 
+@st.cache_resource
+def http_session():
+    """Keep-alive session with retry/backoff shared across reruns (page + workbook hit the same host)"""
+    session = requests.Session()
+    session.headers.update({'User-Agent': 'Mozilla/5.0'})
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+    session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry))
+    return session
+
+
+SAFE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'safe')
+
+
+def _safe_cache_path(excel_url, last_modified):
+    """Parquet path for the parsed settlement series, keyed on workbook URL + Last-Modified"""
+    key = hashlib.sha1(f'{excel_url}|{last_modified}'.encode()).hexdigest()[:16]
+    return os.path.join(SAFE_CACHE_DIR, f'fx_settlement_{key}.parquet')
+
+
+def _prune_safe_cache(keep_path):
+    """Delete superseded settlement files (earlier workbook versions are never read again)"""
+    for entry in os.scandir(SAFE_CACHE_DIR):
+        if entry.name.startswith('fx_settlement_') and entry.name.endswith('.parquet') and entry.path != keep_path:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass  # Raced with another session, or read-only
+
+
 @st.cache_data(ttl=3600)  # Cache for 1 hour
 def scrape_fx_settlement():
     """Scrape FX Settlement data from SAFE China"""
     url = 'https://www.safe.gov.cn/en/2023/0215/2048.html'
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    response = requests.get(url, headers=headers, timeout=30)
+    session = http_session()
+    response = session.get(url, timeout=30)
     soup = BeautifulSoup(response.content, 'html.parser')
     
     excel_url = None
@@ -37,56 +69,50 @@ def scrape_fx_settlement():
             excel_url = 'https://www.safe.gov.cn' + href
             break
     
-    excel_response = requests.get(excel_url, headers=headers, timeout=30)
+    # The workbook is tens of MB of XML for ~40 rows we use; skip it while SAFE hasn't republished
+    # Best effort only: any HEAD failure just means no cache key (a short timeout keeps it from stalling the GET)
+    try:
+        head = session.head(excel_url, timeout=10, allow_redirects=True)
+        last_modified = head.headers.get('Last-Modified') if head.ok else None
+    except requests.RequestException:
+        last_modified = None
+    cache_path = _safe_cache_path(excel_url, last_modified) if last_modified else None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            return pd.read_parquet(cache_path)
+        except Exception:
+            pass  # Corrupt/partial file: fall through and re-parse
+    
+    excel_response = session.get(excel_url, timeout=30)
     excel_file = BytesIO(excel_response.content)
     df_raw = pd.read_excel(excel_file, sheet_name='in USD (Monthly)')
     
-    # Clean - Row 2 has dates, Row 3+ is data
+    # Clean - Row 2 has dates (Timestamps or date strings), Row 3+ is data
     headers_row = df_raw.iloc[2]
-    new_columns = []
-    for val in headers_row:
-        if pd.isna(val):
-            new_columns.append('Label')
-        elif isinstance(val, pd.Timestamp):
-            new_columns.append(val.strftime('%b %Y'))
-        else:
-            try:
-                dt = pd.to_datetime(val)
-                new_columns.append(dt.strftime('%b %Y'))
-            except:
-                new_columns.append(str(val))
-    
-    df = df_raw.iloc[3:].copy()
-    df.columns = new_columns
-    df = df.reset_index(drop=True)
-    
-    # Get month columns
-    month_cols = [col for col in df.columns if any(m in str(col) for m in 
-                  ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])]
-    
-    # Build arrays for rows 22 and 37
-    row_22_vals = []
-    row_37_vals = []
-    valid_months = []
+    month_starts = pd.to_datetime(headers_row, errors='coerce', format='mixed').dt.to_period('M').dt.to_timestamp()
+    is_month = month_starts.notna().to_numpy()
     
-    for i, col in enumerate(df.columns):
-        if col in month_cols:
-            val_22 = df.iloc[22, i]
-            val_37 = df.iloc[37, i]
-            row_22_vals.append(float(val_22) if pd.notna(val_22) else np.nan)
-            row_37_vals.append(float(val_37) if pd.notna(val_37) else np.nan)
-            valid_months.append(col)
+    df = df_raw.iloc[3:].reset_index(drop=True)
     
-    row_22_vals = np.array(row_22_vals)
-    row_37_vals = np.array(row_37_vals)
+    # Rows 22 and 37 across the month columns
+    row_22_vals = pd.to_numeric(df.iloc[22, is_month], errors='coerce').to_numpy(dtype=float)
+    row_37_vals = pd.to_numeric(df.iloc[37, is_month], errors='coerce').to_numpy(dtype=float)
     
     # FX Settlement = Row 22 + Row 37 MoM change (convert to billions)
     row_37_mom = np.diff(row_37_vals, prepend=np.nan)
     fx_settlement = (row_22_vals + row_37_mom) / 10
     
-    dates = pd.to_datetime(valid_months, format='%b %Y')
+    dates = pd.DatetimeIndex(month_starts[is_month])
     
-    return pd.DataFrame({'Date': dates, 'FX_Settlement': fx_settlement})
+    fx_df = pd.DataFrame({'Date': dates, 'FX_Settlement': fx_settlement})
+    if cache_path:
+        try:
+            os.makedirs(SAFE_CACHE_DIR, exist_ok=True)
+            fx_df.to_parquet(cache_path)
+            _prune_safe_cache(cache_path)
+        except Exception:
+            pass  # Read-only deploys still work off st.cache_data
+    return fx_df
 
 
 @st.cache_data(ttl=3600)
@@ -0,0 +1,2 @@
+# Root conftest: under pytest's default import mode its directory goes on sys.path,
+# so tests can import the top-level app modules (e.g. `kernels`) with a plain `pytest`.
@@ -0,0 +1,329 @@
+"""
+Numba kernels for the screener.
+
+Kept out of Screener.py on purpose: Streamlit re-executes the app script on every
+interaction, which would re-decorate (and reload from the disk cache) every kernel on
+each rerun. As an imported module they compile or load once per process.
+"""
+
+import numpy as np
+from numba import njit, types
+
+# Explicit Numba signatures (compile at decoration). Inputs are typed as read-only so
+# both writable arrays and pandas' copy-on-write read-only views dispatch to them.
+_F64_1D = types.float64[:]
+_F64_1D_RO = types.Array(types.float64, 1, 'A', readonly=True)
+_I64_1D = types.int64[:]
+_I64_1D_RO = types.Array(types.int64, 1, 'A', readonly=True)
+
+
+@njit(_I64_1D(_I64_1D_RO, types.int64), cache=True)
+def greedy_nonoverlap_kernel(pos, gap):
+    """Greedy scan over sorted positions: keep one, then skip anything closer than `gap`."""
+    n = pos.size
+    out = np.empty(n, dtype=np.int64)
+    k = 0
+    for i in range(n):
+        if k == 0 or pos[i] - out[k - 1] >= gap:
+            out[k] = pos[i]
+            k += 1
+    return out[:k]
+
+
+@njit(_I64_1D(_F64_1D_RO, _F64_1D_RO, _F64_1D_RO, types.float64, types.float64, types.float64, types.float64), cache=True)
+def analog_positions_kernel(r7, z, fwd, curr_r7, curr_z, r7_tol, z_tol):
+    """
+    Positions of past bars whose 7D return and Z are both within tolerance of today's,
+    in one pass. Bars with a NaN input (r7 warm-up, or the trailing bars without a
+    completed forward return) never match.
+    """
+    n = r7.size
+    out = np.empty(n, dtype=np.int64)
+    k = 0
+    for i in range(n):
+        if (abs(r7[i] - curr_r7) <= r7_tol and abs(z[i] - curr_z) <= z_tol
+                and not np.isnan(fwd[i])):
+            out[k] = i
+            k += 1
+    return out[:k]
+
+
+@njit(_F64_1D(_F64_1D_RO, _F64_1D_RO, types.float64), cache=True, fastmath=True)
+def garch11_sigma2(params, r, backcast):
+    """Constant-mean GARCH(1,1) variance recursion; sigma2[0] is seeded from `backcast`."""
+    mu, omega, alpha, beta = params[0], params[1], params[2], params[3]
+    n = r.shape[0]
+    sigma2 = np.empty(n)
+    prev_e2 = backcast
+    prev_s2 = backcast
+    for t in range(n):
+        sigma2[t] = omega + alpha * prev_e2 + beta * prev_s2
+        e = r[t] - mu
+        prev_e2 = e * e
+        prev_s2 = sigma2[t]
+    return sigma2
+
+
+@njit(types.float64(_F64_1D_RO, _F64_1D_RO, types.float64), cache=True, fastmath=True)
+def garch11_negloglik(params, r, backcast):
+    """Gaussian negative log-likelihood of the constant-mean GARCH(1,1), fused with the recursion."""
+    mu, omega, alpha, beta = params[0], params[1], params[2], params[3]
+    n = r.shape[0]
+    prev_e2 = backcast
+    sigma2 = backcast
+    ll = 0.0
+    for t in range(n):
+        sigma2 = omega + alpha * prev_e2 + beta * sigma2
+        e = r[t] - mu
+        prev_e2 = e * e
+        ll += np.log(sigma2) + prev_e2 / sigma2
+    return 0.5 * (ll + n * np.log(2.0 * np.pi))
+
+
+@njit(types.UniTuple(types.float64, 2)(_F64_1D_RO, types.int64, types.float64), cache=True, fastmath=True)
+def var_cvar_kernel(r, h, conf):
+    """
+    Rolling h-day log-return sum (running accumulator) -> simple returns, then the
+    (1-conf) quantile (method='lower') and the mean of the tail at or below it.
+    Returns (cutoff, tail_mean) as fractions; NaN when there is not enough data.
+    """
+    n = r.shape[0]
+    h = max(h, 1)
+    m = n - h + 1
+    if m <= 0:
+        return np.nan, np.nan
+    out = np.empty(m)
+    acc = 0.0
+    for i in range(h):
+        acc += r[i]
+    out[0] = np.expm1(acc)
+    for i in range(1, m):
+        acc += r[i + h - 1] - r[i - 1]
+        out[i] = np.expm1(acc)
+    # 'lower' empirical quantile: the k-th order statistic, found by O(N) selection.
+    k = int(np.floor((m - 1) * (1.0 - conf)))
+    part = np.partition(out, k)
+    cutoff = part[k]
+    tail_mean = part[:k + 1].mean()
+    return cutoff, tail_mean
+
+
+@njit(types.float64(_F64_1D_RO, types.int64), cache=True, nogil=True)
+def adf_tstat_kernel(y, lags):
+    """
+    Augmented Dickey-Fuller t-statistic (constant, fixed `lags`): OLS of Δy_t on
+    y_{t-1}, Δy_{t-1..t-lags} and 1 via the normal equations; same sample as
+    statsmodels' `adfuller(autolag=None)`. NaN when the sample is too short for `lags`
+    or the design matrix is rank-deficient.
+    """
+    dy = np.empty(y.size - 1)
+    for i in range(dy.size):
+        dy[i] = y[i + 1] - y[i]
+    m = dy.size - lags
+    k = lags + 2
+    if lags < 0 or m <= k:
+        return np.nan  # Fewer rows than regressors: no residual dof
+    X = np.empty((m, k))
+    z = np.empty(m)
+    for t in range(m):
+        j = t + lags
+        X[t, 0] = y[j]
+        for l in range(1, lags + 1):
+            X[t, l] = dy[j - l]
+        X[t, k - 1] = 1.0
+        z[t] = dy[j]
+    xtx = X.T @ X
+    # Rank-deficient design (e.g. a flat stretch makes the level and constant collinear).
+    ev = np.linalg.eigvalsh(xtx)
+    if not ev[0] > 1e-12 * ev[-1]:
+        return np.nan
+    xtx_inv = np.linalg.inv(xtx)
+    beta = xtx_inv @ (X.T @ z)
+    resid = z - X @ beta
+    s2 = (resid @ resid) / (m - k)
+    if not s2 > 0.0:
+        return np.nan
+    return beta[0] / np.sqrt(s2 * xtx_inv[0, 0])
+
+
+@njit(types.float64(_F64_1D_RO, types.int64), cache=True, nogil=True)
+def kpss_stat_kernel(x, lags):
+    """
+    KPSS level-stationarity statistic: mean squared partial sum of the demeaned series
+    over n times the Newey-West (Bartlett, `lags`) long-run variance. NaN for fewer
+    than two points or a non-positive long-run variance (flat series).
+    """
+    n = x.size
+    if n < 2:
+        return np.nan
+    e = x - x.mean()
+    s = 0.0
+    eta = 0.0
+    lrv = 0.0
+    for i in range(n):
+        s += e[i]
+        eta += s * s
+        lrv += e[i] * e[i]
+    for k in range(1, lags + 1):
+        acc = 0.0
+        for i in range(k, n):
+            acc += e[i] * e[i - k]
+        lrv += 2.0 * (1.0 - k / (lags + 1.0)) * acc
+    if not lrv > 0.0:
+        return np.nan
+    return (eta / (n * n)) / (lrv / n)
+
+
+@njit(_F64_1D(_F64_1D_RO, types.float64, types.int64), cache=True)
+def boxcox_detrend_z_kernel(p, lmbda, w):
+    """
+    Fused cheapness signal for a known Box-Cox lambda:
+    Box-Cox transform -> least-squares linear detrend (over the positive prices, like
+    scipy's `detrend`) -> rolling z-score over `w` bars (sample std, ddof=1).
+    Non-positive prices are NaN and so is any z window that contains one.
+    """
+    n = p.size
+    y = np.full(n, np.nan)
+    # Pass 1: transform + count/mean of the positive observations.
+    k = 0
+    sy = 0.0
+    for i in range(n):
+        v = p[i]
+        if v > 0:
+            y[i] = np.log(v) if lmbda == 0.0 else (v ** lmbda - 1.0) / lmbda
+            sy += y[i]
+            k += 1
+    z = np.full(n, np.nan)
+    if k < 2:
+        return z
+    # Pass 2: OLS slope vs. the positive-observation counter t = 0..k-1 (centred).
+    my = sy / k
+    mt = (k - 1) / 2.0
+    stt = k * (k * k - 1.0) / 12.0
+    sty = 0.0
+    t = 0
+    for i in range(n):
+        if not np.isnan(y[i]):
+            sty += (t - mt) * (y[i] - my)
+            t += 1
+    slope = sty / stt
+    # Pass 3: detrend in place and slide the rolling sums (residuals are ~zero-mean, so
+    # the sum-of-squares variance identity is well conditioned).
+    t = 0
+    s1 = 0.0
+    s2 = 0.0
+    valid = 0
+    for i in range(n):
+        if not np.isnan(y[i]):
+            y[i] = y[i] - my - slope * (t - mt)
+            t += 1
+            s1 += y[i]
+            s2 += y[i] * y[i]
+            valid += 1
+        if i >= w:
+            old = y[i - w]
+            if not np.isnan(old):
+                s1 -= old
+                s2 -= old * old
+                valid -= 1
+        if i >= w - 1 and valid == w:
+            mu = s1 / w
+            var = max(s2 - w * mu * mu, 0.0) / (w - 1)
+            if var > 0.0:
+                z[i] = (y[i] - mu) / np.sqrt(var)
+    return z
+
+
+@njit(_F64_1D(_F64_1D_RO, types.int64), cache=True)
+def range_ratio_kernel(p, w):
+    """
+    Rolling (max - min) / mean over `w` bars, with min, max and sum gathered in one
+    sweep of each window. NaN for the warm-up and for windows containing a NaN.
+    """
+    n = p.size
+    out = np.full(n, np.nan)
+    for i in range(w - 1, n):
+        lo = np.inf
+        hi = -np.inf
+        acc = 0.0
+        for j in range(i - w + 1, i + 1):
+            v = p[j]
+            if v < lo:
+                lo = v
+            if v > hi:
+                hi = v
+            acc += v
+        if np.isfinite(acc):
+            out[i] = (hi - lo) / (acc / w)
+    return out
+
+
+@njit(_F64_1D(_F64_1D_RO), cache=True)
+def drawdown_kernel(log_level):
+    """
+    Single pass over a log-level series: running max and drawdown vs that max,
+    exp(x - max) - 1 (the same as S/max(S) - 1 for S = exp(x), without exponentiating S).
+    """
+    n = log_level.size
+    out = np.empty(n)
+    m = -np.inf
+    for i in range(n):
+        v = log_level[i]
+        if v > m:
+            m = v
+        out[i] = np.expm1(v - m)
+    return out
+
+
+@njit(_F64_1D(_F64_1D_RO, _F64_1D_RO, types.int64), cache=True)
+def rolling_corr_kernel(x, y, w):
+    """
+    Rolling Pearson correlation over `w` bars in O(N) by sliding the sums
+    Σx, Σy, Σx², Σy², Σxy. Windows containing a NaN in either input are NaN.
+    """
+    n = x.size
+    out = np.full(n, np.nan)
+    sx = sy = sxx = syy = sxy = 0.0
+    valid = 0
+    for i in range(n):
+        xi, yi = x[i], y[i]
+        if not (np.isnan(xi) or np.isnan(yi)):
+            sx += xi
+            sy += yi
+            sxx += xi * xi
+            syy += yi * yi
+            sxy += xi * yi
+            valid += 1
+        if i >= w:
+            xo, yo = x[i - w], y[i - w]
+            if not (np.isnan(xo) or np.isnan(yo)):
+                sx -= xo
+                sy -= yo
+                sxx -= xo * xo
+                syy -= yo * yo
+                sxy -= xo * yo
+                valid -= 1
+        if i >= w - 1 and valid == w:
+            den = (w * sxx - sx * sx) * (w * syy - sy * sy)
+            if den > 0.0:
+                out[i] = (w * sxy - sx * sy) / np.sqrt(den)
+    return out
+
+
+def warmup():
+    """
+    Exercise every kernel once. Explicit signatures already compile eagerly at import
+    (and `cache=True` reloads from disk in later processes); this just front-loads the
+    dispatch so the first user interaction doesn't stall.
+    """
+    drawdown_kernel(np.ones(2))
+    adf_tstat_kernel(np.cumsum(np.ones(12)) ** 0.5, 1)
+    kpss_stat_kernel(np.arange(6.0), 1)
+    range_ratio_kernel(np.ones(4), 2)
+    greedy_nonoverlap_kernel(np.arange(3, dtype=np.int64), 2)
+    analog_positions_kernel(np.zeros(3), np.zeros(3), np.zeros(3), 0.0, 0.0, 0.1, 0.5)
+    var_cvar_kernel(np.zeros(30), 10, 0.95)
+    garch11_negloglik(np.array([0.0, 0.1, 0.05, 0.9]), np.zeros(30), 1.0)
+    garch11_sigma2(np.array([0.0, 0.1, 0.05, 0.9]), np.zeros(30), 1.0)
+    rolling_corr_kernel(np.zeros(4), np.zeros(4), 2)
+    boxcox_detrend_z_kernel(np.ones(4), 0.5, 2)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from statsmodels.tsa.stattools import adfuller
+
+from kernels import adf_tstat_kernel, kpss_stat_kernel
+
+
+def _random_walk(n, seed=0):
+    return np.cumsum(np.random.default_rng(seed).normal(size=n))
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")  # adfuller tuple-return notice
+@pytest.mark.parametrize("n", [10, 12, 14, 16])
+def test_adf_short_sample_at_capped_lag(n):
+    # Screener caps the lag at nobs // 2 - 2, which must always leave residual dof.
+    y = _random_walk(n)
+    lags = min(int(12 * (n / 100) ** 0.25), n // 2 - 2)
+    tstat = adf_tstat_kernel(y, lags)
+    assert np.isfinite(tstat)
+    assert tstat == pytest.approx(adfuller(y, maxlag=lags, autolag=None)[0])
+
+
+@pytest.mark.parametrize("n", [10, 16])
+def test_adf_too_many_lags_is_nan(n):
+    y = _random_walk(n)
+    assert np.isnan(adf_tstat_kernel(y, n - 2))
+    assert np.isnan(adf_tstat_kernel(y, n // 2))
+
+
+def test_adf_rank_deficient_is_nan():
+    assert np.isnan(adf_tstat_kernel(np.ones(12), 1))
+
+
+@pytest.mark.parametrize("n", [10, 16])
+def test_kpss_short_sample(n):
+    assert np.isfinite(kpss_stat_kernel(_random_walk(n), 3))
+    assert np.isnan(kpss_stat_kernel(np.full(n, 2.0), 3))